@@ -0,0 +1,7 @@
+'''
+Lets the tests import the scripts in the repository root, however pytest is started.
+'''
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
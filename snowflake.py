@@ -4,9 +4,13 @@ Draw mirrored snowflakes!
 from __future__ import annotations
 
 # === IMPORTS ===
+import collections
 import math
 import sys
-from typing import Tuple, Dict
+import threading
+import traceback
+from typing import Tuple, Dict, Iterable, List, NamedTuple, Optional, OrderedDict
+import numpy
 import pygame
 
 # === CONSTANTS ===
@@ -47,6 +51,19 @@ UI_ROTATE_POSITION = (SCREEN_HEIGHT // 2 + 100, SCREEN_HEIGHT - 150)
 UI_SLICE_POSITION = (20, SCREEN_HEIGHT - 70)
 UI_Y_0 = 0
 UI_Y_1 = 550
+# Speculation constants
+IDLE_FRAMES = 15 # Frames without drawing before precomputing begins
+SPECULATION_DEPTH = 3 # Sizes to precompute ahead in the Tab cycle
+# Image import constants
+IMPORT_STEP = LINE_THICKNESS # Distance between imported points, in segment pixels
+IMPORT_THRESHOLD = 128 # Luminance below which image pixels are foreground
+IMPORT_ALPHA_THRESHOLD = 128 # Opacity below which image pixels are background
+LUMINANCE_WEIGHTS = (0.299, 0.587, 0.114)
+# Remap rendering constants
+USE_REMAP_RENDERER = True # Render the snowflake through cached remap tables
+REMAP_ANGLE_BUCKET = abs(ROTATION_SPEED) # Largest rotation covered by each remap table, in radians
+REMAP_CACHE_BYTES = 96 * 1024 * 1024 # Enough for a full rotation at any size
+REMAP_CHUNK_POINTS = 256 # Points added to the bitmap at once, to bound memory use
 # Defaults
 DEFAULT_SIZE = 6
 DEFAULT_MIRROR = True
@@ -170,6 +187,17 @@ class SnowflakeSegment:
         self.x, self.y = origin
         self.centered_angle = centered_angle
 
+    def copy(self, *, origin: Optional[Tuple[int, int]] = None) -> SnowflakeSegment:
+        '''
+        Returns a copy of the segment, optionally moved to a new origin.
+        '''
+        return SnowflakeSegment(
+            radius=self.radius,
+            size=self.size,
+            origin=self.origin if origin is None else origin,
+            centered_angle=self.centered_angle
+        )
+
     def contains_point(self, point: PolarPoint) -> bool:
         '''
         Determines whether the given rectangular point is within the area encompassed by the segment.
@@ -315,6 +343,22 @@ class Snowflake:
         # Internals
         self._current_angle = 0
     
+    def copy(self, *, origin: Optional[Tuple[int, int]] = None) -> Snowflake:
+        '''
+        Returns a copy of the snowflake, optionally moved to a new origin.
+
+        The pixel data is copied, so the copy can be changed independently.
+        '''
+        snowflake = Snowflake(
+            radius=self.radius,
+            size=self.size,
+            origin=self.origin if origin is None else origin,
+            mirror=self.mirror
+        )
+        snowflake.pixels = dict(self.pixels)
+        snowflake._current_angle = self._current_angle
+        return snowflake
+
     def set_pixel(self, point: PolarPoint, value: int) -> None:
         '''
         Sets a pixel value. 
@@ -493,10 +537,669 @@ class Snowflake:
                     LINE_THICKNESS
                 )
 
+# === HEADLESS RENDERING ===
+def render_snowflake(
+        points: Iterable[Tuple[float, float]],
+        *,
+        size: int = DEFAULT_SIZE,
+        mirror: bool = DEFAULT_MIRROR,
+        angle: float = 0,
+        resolution: int = SNOWFLAKE_RADIUS * 2
+    ) -> pygame.Surface:
+    '''
+    Renders a complete snowflake onto a new square surface. No display is required.
+
+    Points are (theta, radius) pairs, where the radius is a fraction of the snowflake radius.
+    Points outside of the slice for the given size are discarded.
+
+    Returns the rendered surface.
+    '''
+    # Center the flake on the surface.
+    # Drawing flips y around the screen height, so the origin uses the same
+    # bottom-left coordinates as the main window does.
+    center = resolution // 2
+    snowflake = Snowflake(
+        radius=max(center - LINE_THICKNESS, 1),
+        size=size,
+        origin=(center, SCREEN_HEIGHT - center),
+        mirror=mirror
+    )
+    # A unit slice, used to discard points outside of the drawing zone
+    segment = SnowflakeSegment(radius=1, size=size)
+    for theta, radius in points:
+        point = PolarPoint(radius, theta % RADIANS_IN_CIRCLE)
+        if segment.contains_point(point):
+            # Scale up to the output radius
+            point.radius *= snowflake.radius
+            snowflake.set_pixel(point, 1)
+    snowflake.rotate(angle)
+
+    # Draw the snowflake on a blank surface
+    surface = pygame.Surface((resolution, resolution))
+    surface.fill(BACKGROUND_COLOR)
+    snowflake.draw_outline(surface)
+    snowflake.draw_pixels(surface)
+    return surface
+
+def render_segment_sprite(snowflake: Snowflake, segment: SnowflakeSegment) -> pygame.Surface:
+    '''
+    Renders the segment and its pixel data onto a new surface the size of the segment region.
+
+    Blitting the sprite onto the region is equivalent to redrawing the segment.
+    '''
+    region = segment.get_region(update=False)
+    sprite = pygame.Surface(region.size)
+    sprite.fill(BACKGROUND_COLOR)
+    # Move the segment so that it is drawn relative to the sprite
+    x, y = segment.origin
+    local_segment = segment.copy(origin=(x - region.x, y + region.y))
+    local_segment.draw_outline(sprite)
+    snowflake.draw_segment(sprite, local_segment)
+    return sprite
+
+def render_flake_sprite(snowflake: Snowflake) -> pygame.Surface:
+    '''
+    Renders the snowflake onto a new surface the size of the snowflake region.
+
+    Blitting the sprite onto the region is equivalent to redrawing the snowflake.
+    '''
+    region = snowflake.get_region(update=False)
+    sprite = pygame.Surface(region.size)
+    sprite.fill(BACKGROUND_COLOR)
+    # Move the snowflake so that it is drawn relative to the sprite
+    x, y = snowflake.origin
+    local_flake = snowflake.copy(origin=(x - region.x, y + region.y))
+    local_flake.draw_outline(sprite)
+    local_flake.draw_pixels(sprite)
+    return sprite
+
+# === IMAGE IMPORT ===
+def import_image(
+        image: pygame.Surface,
+        snowflake: Snowflake,
+        segment: SnowflakeSegment,
+        *,
+        step: float = IMPORT_STEP,
+        threshold: float = IMPORT_THRESHOLD,
+        invert: bool = False
+    ) -> int:
+    '''
+    Adds the foreground of an image to the snowflake, as slice points.
+
+    The image is scaled to cover the bounding box of the segment, and cropped to the segment.
+    It is sampled on a grid with the given step, in segment pixels.
+    Dark pixels are foreground, unless invert is True. Transparent pixels are always background.
+
+    Returns the number of points added.
+    '''
+    # Bounding box of the segment, relative to its origin
+    half_arc = RADIANS_IN_CIRCLE / segment.size / 2
+    width = segment.radius
+    half_height = segment.radius * math.sin(min(half_arc, math.pi / 2))
+
+    # Scale the image so that each image pixel is a grid cell
+    image_width, image_height = image.get_size()
+    scale = max(width / image_width, 2 * half_height / image_height) / step
+    columns = max(math.ceil(image_width * scale), 1)
+    rows = max(math.ceil(image_height * scale), 1)
+    if image.get_bitsize() not in (24, 32):
+        # Smooth scaling needs a true color image
+        converted = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+        converted.blit(image, (0, 0))
+        image = converted
+    scaled = pygame.transform.smoothscale(image, (columns, rows))
+
+    # Grid of sample points, with y pointing up
+    x = numpy.arange(0, math.floor(width / step) + 1) * step
+    y_count = math.floor(half_height / step)
+    y = numpy.arange(-y_count, y_count + 1) * step
+    x, y = numpy.meshgrid(x, y, indexing="ij")
+
+    # Convert to polar coordinates
+    radius = numpy.hypot(x, y)
+    theta = numpy.arctan2(y, x) % RADIANS_IN_CIRCLE
+    # Keep points within the segment, as in SnowflakeSegment.contains_point
+    angle_arc = RADIANS_IN_CIRCLE / segment.size
+    angle_begin = RADIANS_IN_CIRCLE - (angle_arc / 2)
+    angle_end = angle_arc / 2
+    inside = ~((theta < angle_begin) & (theta > angle_end))
+    inside &= (radius <= segment.radius) & (radius >= 0)
+
+    # Find the image pixel under each point, with the image centered on the box
+    left = (width - columns * step) / 2
+    top = (rows * step) / 2
+    column = numpy.clip(((x - left) / step).astype(int), 0, columns - 1)
+    row = numpy.clip(((top - y) / step).astype(int), 0, rows - 1)
+
+    # Threshold the image
+    pixels = pygame.surfarray.array3d(scaled)
+    luminance = pixels @ numpy.array(LUMINANCE_WEIGHTS)
+    foreground = luminance > threshold if invert else luminance < threshold
+    if scaled.get_flags() & pygame.SRCALPHA:
+        foreground &= pygame.surfarray.array_alpha(scaled) >= IMPORT_ALPHA_THRESHOLD
+    inside &= foreground[column, row]
+
+    # Add the points, adjusting the radius to fit inside the output snowflake
+    radius = radius[inside] * snowflake.radius / segment.radius
+    theta = theta[inside]
+    for point_radius, point_theta in zip(radius.tolist(), theta.tolist()):
+        snowflake.set_pixel(PolarPoint(point_radius, point_theta), 1)
+    return len(radius)
+
+# === REMAP RENDERING ===
+class RemapRenderer:
+    '''
+    Renders a complete snowflake from a polar bitmap of its slice.
+
+    Each output pixel is mapped to a bitmap cell by a precomputed remap table,
+    which has the size, mirror mode and rotation built in. Each frame is then a single gather,
+    whose cost does not depend on how many points were drawn.
+
+    Tables are cached per size, mirror mode and rotation bucket, up to a memory limit.
+    '''
+    radius: float
+    cache_bytes: int
+    size: int
+    bitmap: numpy.ndarray # (theta, radius) cells, with an extra empty cell at the end
+
+    _side: int
+    _radius_cells: int
+    _base_theta: numpy.ndarray
+    _base_radius: numpy.ndarray
+    _tables: OrderedDict[Tuple[int, bool, int], numpy.ndarray]
+    _table_bytes: int
+    _dirty: bool
+    _sprite: pygame.Surface
+
+    def __init__(
+            self,
+            *,
+            radius: float = 1,
+            size: int = DEFAULT_SIZE,
+            cache_bytes: int = REMAP_CACHE_BYTES
+        ) -> RemapRenderer:
+        '''
+        Initializes the renderer for snowflakes of the given radius.
+        '''
+        self.radius = radius
+        self.cache_bytes = cache_bytes
+        # One radius cell per output pixel
+        self._radius_cells = max(math.ceil(radius), 1)
+        self._side = 2 * self._radius_cells + 1
+
+        # Polar coordinates of each output pixel, indexed [x, y] with y pointing down
+        offsets = numpy.arange(self._side) - self._radius_cells
+        x, y = numpy.meshgrid(offsets, -offsets, indexing="ij")
+        self._base_theta = numpy.arctan2(y, x)
+        self._base_radius = numpy.hypot(x, y)
+
+        # Cache
+        self._tables = collections.OrderedDict()
+        self._table_bytes = 0
+
+        # The output surface, where empty cells are transparent
+        self._sprite = pygame.Surface((self._side, self._side), depth=8)
+        self._sprite.set_palette([BACKGROUND_COLOR, SNOWFLAKE_COLOR])
+        self._sprite.set_colorkey(0)
+
+        # Nothing has been built from a snowflake yet
+        self._resize(size)
+        self.invalidate()
+
+    def _get_theta_cells(self, size: int) -> int:
+        '''
+        Returns the number of theta cells in a slice, for the given slice count.
+        '''
+        # One theta cell per output pixel at the edge of the snowflake
+        arc = RADIANS_IN_CIRCLE / size
+        return max(math.ceil(self._radius_cells * arc), 1)
+
+    def _resize(self, size: int) -> None:
+        '''
+        Clears the bitmap, resizing it for the given slice count.
+        '''
+        self.set_bitmap(size, self._empty_bitmap(size))
+
+    def _empty_bitmap(self, size: int) -> numpy.ndarray:
+        '''
+        Returns a blank bitmap for the given slice count.
+        '''
+        return numpy.zeros(self._get_theta_cells(size) * self._radius_cells + 1, numpy.uint8)
+
+    def invalidate(self) -> None:
+        '''
+        Marks the bitmap for rebuilding from the snowflake before the next render.
+
+        This must be called whenever pixels are removed from the snowflake.
+        '''
+        self._dirty = True
+
+    def build_bitmap(self, snowflake: Snowflake) -> numpy.ndarray:
+        '''
+        Returns a new bitmap of the pixels of the snowflake, without changing the current one.
+
+        This may be called from another thread, such as when precomputing.
+        '''
+        bitmap = self._empty_bitmap(snowflake.size)
+        if snowflake.pixels:
+            points = numpy.array(
+                [(pixel.theta, pixel.radius, value) for pixel, value in snowflake.pixels.items()]
+            )
+            self._add(bitmap, snowflake.size, points[:, 0], points[:, 1], points[:, 2])
+        return bitmap
+
+    def set_bitmap(self, size: int, bitmap: numpy.ndarray) -> None:
+        '''
+        Swaps in a bitmap from build_bitmap, for the given slice count.
+        '''
+        self.size = size
+        self.bitmap = bitmap
+        self._dirty = False
+
+    def set_pixels(self, snowflake: Snowflake) -> None:
+        '''
+        Rebuilds the bitmap from all of the pixels of the snowflake.
+        '''
+        self.set_bitmap(snowflake.size, self.build_bitmap(snowflake))
+
+    def add_pixel(self, point: PolarPoint, value: int) -> None:
+        '''
+        Adds a single pixel to the bitmap, as set with Snowflake.set_pixel.
+        '''
+        self._add(
+            self.bitmap,
+            self.size,
+            numpy.array([point.theta]),
+            numpy.array([point.radius]),
+            numpy.array([value])
+        )
+
+    def _add(
+            self,
+            bitmap: numpy.ndarray,
+            size: int,
+            theta: numpy.ndarray,
+            radius: numpy.ndarray,
+            value: numpy.ndarray
+        ) -> None:
+        '''
+        Sets every cell whose center is within a pixel circle of each point, clipped to the slice.
+
+        Each nearby cell is tested, so that cells near the center of the snowflake,
+        which are much narrower than a pixel, are not missed.
+        '''
+        arc = RADIANS_IN_CIRCLE / size
+        theta_cells = self._get_theta_cells(size)
+        cell_arc = arc / theta_cells
+        # Positions in cells, with theta relative to the center of the slice
+        radius = radius * self._radius_cells / self.radius
+        theta = (theta + arc / 2) % RADIANS_IN_CIRCLE - arc / 2
+        # Group points by radius, so that only chunks near the center test every column
+        order = numpy.argsort(radius, kind="stable")
+        theta, radius, value = theta[order], radius[order], value[order]
+        # Rows that a circle can reach, relative to its own row
+        rows = numpy.arange(-LINE_THICKNESS - 1, LINE_THICKNESS + 2)
+
+        for start in range(0, len(radius), REMAP_CHUNK_POINTS):
+            chunk = slice(start, start + REMAP_CHUNK_POINTS)
+            point_theta = theta[chunk][:, None, None]
+            point_radius = radius[chunk][:, None, None]
+            point_value = value[chunk][:, None, None]
+
+            # Columns that a circle can reach. Circles further out cover a narrower angle.
+            nearest = radius[chunk].min()
+            if nearest > LINE_THICKNESS:
+                reach = math.ceil(math.asin(LINE_THICKNESS / nearest) / cell_arc) + 1
+                columns = numpy.arange(-reach, reach + 1)
+                theta_cell = ((point_theta + arc / 2) // cell_arc).astype(int) + columns
+            else:
+                theta_cell = numpy.arange(theta_cells)[None, None, :]
+            radius_cell = point_radius.astype(int) + rows[None, :, None]
+
+            # Distance from each point to the center of each nearby cell
+            cell_theta = (theta_cell + 0.5) * cell_arc - arc / 2
+            cell_radius = radius_cell + 0.5
+            distance_squared = cell_radius ** 2 + point_radius ** 2 \
+                - 2 * cell_radius * point_radius * numpy.cos(cell_theta - point_theta)
+            inside = distance_squared <= LINE_THICKNESS ** 2
+            inside &= (theta_cell >= 0) & (theta_cell < theta_cells)
+            inside &= (radius_cell >= 0) & (radius_cell < self._radius_cells)
+
+            # Set the cells
+            theta_cell = numpy.broadcast_to(theta_cell, inside.shape)[inside]
+            radius_cell = numpy.broadcast_to(radius_cell, inside.shape)[inside]
+            cell_value = numpy.broadcast_to(point_value, inside.shape)[inside]
+            bitmap[theta_cell * self._radius_cells + radius_cell] = cell_value
+
+    def _get_table(self, size: int, mirror: bool, angle: float) -> numpy.ndarray:
+        '''
+        Returns the remap table for the given state, building it if it is not cached.
+        '''
+        arc = RADIANS_IN_CIRCLE / size
+        # Rotating by a whole period looks identical, so only angles within one are needed
+        period = 2 * arc if mirror else arc
+        # Buckets are no wider than a frame's rotation, so every frame moves
+        buckets = max(math.ceil(period / REMAP_ANGLE_BUCKET), 1)
+        bucket = round(angle % period / period * buckets) % buckets
+        key = (size, mirror, bucket)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+
+        # Undo the rotation
+        theta = self._base_theta - bucket * period / buckets
+        # Fold into the slice, as in Snowflake.draw_pixels
+        segment = numpy.round(theta / arc)
+        theta = theta - segment * arc
+        if mirror:
+            odd = segment % 2 == 1
+            theta[odd] = -theta[odd]
+        # Convert to cells
+        theta_cells = self._get_theta_cells(size)
+        theta_cell = ((theta + arc / 2) / arc * theta_cells).astype(int)
+        theta_cell = numpy.clip(theta_cell, 0, theta_cells - 1)
+        radius_cell = self._base_radius.astype(int)
+        table = theta_cell * self._radius_cells + radius_cell
+        # Pixels outside the snowflake use the empty cell
+        table[self._base_radius >= self._radius_cells] = theta_cells * self._radius_cells
+        table = table.astype(numpy.min_scalar_type(table.max()))
+
+        # Cache the table, evicting the least recently used ones to fit
+        self._tables[key] = table
+        self._table_bytes += table.nbytes
+        while self._table_bytes > self.cache_bytes and len(self._tables) > 1:
+            _key, evicted = self._tables.popitem(last=False)
+            self._table_bytes -= evicted.nbytes
+        return table
+
+    def render(self, snowflake: Snowflake) -> pygame.Surface:
+        '''
+        Renders the pixels of the snowflake, centered on a surface with transparent empty space.
+
+        The surface is reused between renders.
+        '''
+        if self._dirty or snowflake.size != self.size:
+            self.set_pixels(snowflake)
+        # pylint: disable=protected-access
+        table = self._get_table(snowflake.size, snowflake.mirror, snowflake._current_angle)
+        pygame.surfarray.blit_array(self._sprite, self.bitmap[table])
+        return self._sprite
+
+    def draw_pixels(self, surface: pygame.Surface, snowflake: Snowflake) -> None:
+        '''
+        Draws the pixel data of the snowflake, as with Snowflake.draw_pixels.
+        '''
+        x, y = snowflake.origin
+        y = SCREEN_HEIGHT - y
+        surface.blit(
+            self.render(snowflake),
+            (x - self._radius_cells, y - self._radius_cells)
+        )
+
+# === SPECULATION ===
+def next_size(size: int) -> int:
+    '''
+    Returns the size after the given one, when cycling through valid sizes.
+    '''
+    current_size = VALID_SIZES.index(size)
+    current_size += 1
+    current_size %= len(VALID_SIZES)
+    return VALID_SIZES[current_size]
+
+class Speculation(NamedTuple):
+    '''
+    The precomputed outcome of pressing Tab or M.
+
+    Sprites and bitmaps are None when they would not be used.
+    '''
+    size: int
+    mirror: bool
+    pixels: Dict[PolarPoint, int]
+    segment_sprite: Optional[pygame.Surface]
+    flake_sprite: Optional[pygame.Surface]
+    bitmap: Optional[numpy.ndarray]
+
+class SpeculativeRenderer:
+    '''
+    Precomputes the outcome of pressing Tab or M on a background thread, while the user is idle.
+
+    Flake sprites are only rendered while the snowflake is not rotating,
+    since a rotating snowflake is redrawn every frame anyway.
+    If a remap renderer is given, its bitmaps are built for each size instead,
+    since it renders a frame faster than a sprite could save.
+    '''
+    depth: int
+    remap: Optional[RemapRenderer]
+
+    _condition: threading.Condition
+    _thread: Optional[threading.Thread]
+    _running: bool
+    _busy: bool
+    _generation: int
+    _state: Optional[Tuple[int, bool, Optional[float]]]
+    _job: Optional[Tuple[int, Snowflake, SnowflakeSegment, bool]]
+    _sizes: List[Speculation]
+    _toggled: Optional[Speculation]
+
+    def __init__(
+            self,
+            *,
+            depth: int = SPECULATION_DEPTH,
+            remap: Optional[RemapRenderer] = None
+        ) -> SpeculativeRenderer:
+        '''
+        Initializes the renderer.
+
+        Up to depth sizes are precomputed ahead in the Tab cycle.
+        '''
+        self.depth = depth
+        self.remap = remap
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._busy = False
+        # Data
+        self._generation = 0
+        self._state = None
+        self._job = None
+        self._sizes = []
+        self._toggled = None
+
+    def start(self) -> None:
+        '''
+        Starts the background thread.
+        '''
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name="snowflake-speculation",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''
+        Stops the background thread.
+        '''
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def discard(self) -> None:
+        '''
+        Discards all precomputed results, including any that are still being computed.
+
+        This must be called whenever the pixel data changes.
+        '''
+        with self._condition:
+            self._generation += 1
+            self._state = None
+            self._job = None
+            self._sizes = []
+            self._toggled = None
+
+    def request(
+            self,
+            snowflake: Snowflake,
+            segment: SnowflakeSegment,
+            *,
+            static: bool
+        ) -> None:
+        '''
+        Schedules precomputation for the current state, unless it is already done or underway.
+
+        static should be False while the snowflake is rotating.
+        '''
+        # Flake sprites are not needed with a remap renderer
+        static = static and self.remap is None
+        state = self._get_state(snowflake, static)
+        with self._condition:
+            # Anything computed for a different state is useless
+            if state != self._state:
+                self.discard()
+                self._state = state
+            # Already done or underway
+            elif self._job is not None or self._busy:
+                return
+            elif len(self._sizes) >= self.depth and (self._toggled is not None or not static):
+                return
+            # Snapshot the state, since the pixels may change while we work
+            self._job = (self._generation, snowflake.copy(), segment.copy(), static)
+            self._condition.notify()
+
+    def take_size(self, snowflake: Snowflake, *, static: bool) -> Optional[Speculation]:
+        '''
+        Returns the precomputed outcome of pressing Tab, if it is ready.
+
+        The remaining sizes in the cycle are kept.
+        '''
+        state = self._get_state(snowflake, static)
+        with self._condition:
+            if state != self._state or not self._sizes:
+                return None
+            speculation = self._sizes.pop(0)
+            # Stop any work based on the old state
+            self._generation += 1
+            self._state = (speculation.size, *state[1:])
+            self._job = None
+            self._toggled = None
+        return speculation
+
+    def take_mirror(self, snowflake: Snowflake, *, static: bool) -> Optional[Speculation]:
+        '''
+        Returns the precomputed outcome of pressing M, if it is ready.
+        '''
+        state = self._get_state(snowflake, static)
+        with self._condition:
+            if state != self._state or self._toggled is None:
+                return None
+            speculation = self._toggled
+            # The sizes in the cycle were rendered with the old mirror mode
+            self.discard()
+            self._state = (state[0], speculation.mirror, state[2])
+        return speculation
+
+    def _get_state(self, snowflake: Snowflake, static: bool) -> Tuple[int, bool, Optional[float]]:
+        '''
+        Returns the state that precomputed results depend on.
+        '''
+        # pylint: disable=protected-access
+        angle = snowflake._current_angle if static and self.remap is None else None
+        return (snowflake.size, snowflake.mirror, angle)
+
+    def _run(self) -> None:
+        '''
+        The background thread.
+        '''
+        while True:
+            # Wait for work
+            with self._condition:
+                while self._running and self._job is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                job = self._job
+                self._job = None
+                self._busy = True
+            try:
+                self._speculate(*job)
+            except Exception: # pylint: disable=broad-except
+                # Report the error, but keep speculating for later states
+                print("Speculative rendering failed:", file=sys.stderr)
+                traceback.print_exc()
+                self.discard()
+            finally:
+                with self._condition:
+                    self._busy = False
+
+    def _speculate(
+            self,
+            generation: int,
+            snowflake: Snowflake,
+            segment: SnowflakeSegment,
+            static: bool
+        ) -> None:
+        '''
+        Computes any missing results, stopping early if they are discarded.
+        '''
+        # The other mirror mode only changes the flake sprite
+        with self._condition:
+            toggle = static and self._toggled is None
+        if toggle:
+            flake = snowflake.copy()
+            flake.mirror = not flake.mirror
+            speculation = Speculation(
+                flake.size,
+                flake.mirror,
+                flake.pixels,
+                None,
+                render_flake_sprite(flake),
+                None
+            )
+            with self._condition:
+                if generation != self._generation:
+                    return
+                self._toggled = speculation
+
+        # Continue the Tab cycle from the furthest size so far
+        with self._condition:
+            if generation != self._generation:
+                return
+            count = len(self._sizes)
+            if self._sizes:
+                snowflake.size = self._sizes[-1].size
+                snowflake.pixels = dict(self._sizes[-1].pixels)
+        for _ in range(count, self.depth):
+            # Prune exactly as pressing Tab does
+            flake = snowflake.copy()
+            flake.size = next_size(flake.size)
+            flake_segment = segment.copy()
+            flake_segment.size = flake.size
+            flake.clear_pixels_outside(flake_segment)
+            speculation = Speculation(
+                flake.size,
+                flake.mirror,
+                flake.pixels,
+                render_segment_sprite(flake, flake_segment),
+                render_flake_sprite(flake) if static else None,
+                self.remap.build_bitmap(flake) if self.remap is not None else None
+            )
+            with self._condition:
+                if generation != self._generation:
+                    return
+                self._sizes.append(speculation)
+            snowflake = flake
+
 # === MAIN PROGRAM ===
-def main() -> int:
+def main(image_path: Optional[str] = None) -> int:
     '''
     The main program
+
+    If an image path is given, the image is imported into the snowflake.
     '''
     pygame.init()
 
@@ -518,6 +1221,17 @@ def main() -> int:
     update_flake = False
     update_segment = False
     update_UI = True
+    # Precomputed sprites to use instead of redrawing
+    segment_sprite = None
+    flake_sprite = None
+
+    # Renders the whole snowflake from its slice
+    renderer = RemapRenderer(radius=SNOWFLAKE_RADIUS, size=DEFAULT_SIZE)
+
+    # Precompute the outcome of Tab and M while the user is idle
+    speculation = SpeculativeRenderer(remap=renderer if USE_REMAP_RENDERER else None)
+    speculation.start()
+    idle_frames = 0
 
     # Get the default system font
     font = pygame.font.SysFont(
@@ -538,10 +1252,19 @@ def main() -> int:
         mirror=DEFAULT_MIRROR
     )
 
+    # Import the starting image
+    if image_path is not None:
+        import_image(
+            pygame.image.load(image_path),
+            snowflake,
+            segment
+        )
+
     # Draw the initial state
     surface.fill(BACKGROUND_COLOR)
     segment.draw_outline(surface)
     snowflake.draw_outline(surface)
+    snowflake.draw_segment(surface, segment)
     # Update the display with this
     pygame.display.flip()
 
@@ -563,21 +1286,43 @@ def main() -> int:
                     update_UI = True
                 # M key
                 if event.key == pygame.K_m:
+                    # Use the precomputed flake, if it's ready
+                    result = speculation.take_mirror(
+                        snowflake,
+                        static=not rotate
+                    )
+                    flake_sprite = result.flake_sprite if result is not None else None
                     # Toggle mirroring
                     snowflake.mirror = not snowflake.mirror
                     update_flake = True
                     update_UI = True
                 # Tab key
                 elif event.key == pygame.K_TAB:
+                    # Use the precomputed result, if it's ready
+                    result = speculation.take_size(
+                        snowflake,
+                        static=not rotate
+                    )
                     # Cycle between valid sizes
-                    current_size = VALID_SIZES.index(snowflake.size)
-                    current_size += 1
-                    current_size %= len(VALID_SIZES)
+                    size = next_size(snowflake.size)
                     # Set the segment size
-                    snowflake.size = VALID_SIZES[current_size]
-                    segment.size = VALID_SIZES[current_size]
-                    # Delete any pixels outside the new segment
-                    snowflake.clear_pixels_outside(segment)
+                    snowflake.size = size
+                    segment.size = size
+                    if result is not None:
+                        # Swap in the already pruned pixels
+                        snowflake.pixels = result.pixels
+                        segment_sprite = result.segment_sprite
+                        flake_sprite = result.flake_sprite
+                    else:
+                        # Delete any pixels outside the new segment
+                        snowflake.clear_pixels_outside(segment)
+                        # Any sprites swapped in earlier this frame are out of date
+                        segment_sprite = None
+                        flake_sprite = None
+                    if result is not None and result.bitmap is not None:
+                        renderer.set_bitmap(size, result.bitmap)
+                    else:
+                        renderer.invalidate()
                     # Schedule to update
                     update_segment = True
                     update_flake = True
@@ -586,6 +1331,11 @@ def main() -> int:
                 elif event.key in (pygame.K_BACKSPACE, pygame.K_DELETE):
                     # Clear the snowflake
                     snowflake.clear_pixels()
+                    renderer.invalidate()
+                    speculation.discard()
+                    idle_frames = 0
+                    segment_sprite = None
+                    flake_sprite = None
                     # Update
                     update_segment = True
                     update_flake = True
@@ -612,11 +1362,27 @@ def main() -> int:
                     snowflake.radius / segment.radius
                 # Add the point to our snowflake
                 snowflake.set_pixel(polar_position, 1)
+                renderer.add_pixel(polar_position, 1)
+                # Anything precomputed is now out of date
+                speculation.discard()
+                idle_frames = 0
+                segment_sprite = None
+                flake_sprite = None
                 # Schedule these for updating
                 update_flake = True
                 cursor_position = (mouse_x, SCREEN_HEIGHT - mouse_y)
                 update_cursor = True
 
+        # === SPECULATION ===
+        # Precompute once the user has stopped drawing for a while
+        idle_frames += 1
+        if idle_frames >= IDLE_FRAMES:
+            speculation.request(
+                snowflake,
+                segment,
+                static=not rotate
+            )
+
         # === UI ===
         # Draw each of the texts
         if update_UI:
@@ -672,28 +1438,42 @@ def main() -> int:
         # === DRAW ===
         # If the whole flake needs to be redrawn
         if update_flake:
-            # Draw the background
             flake_region = snowflake.get_region(update=False)
-            pygame.draw.rect(
-                surface,
-                BACKGROUND_COLOR,
-                flake_region
-            )
-            # Draw the full snowflake
-            snowflake.draw_outline(surface)
-            snowflake.draw_pixels(surface)
+            # Swap in the precomputed snowflake, if it's still current
+            if flake_sprite is not None and not rotate:
+                surface.blit(flake_sprite, flake_region)
+            else:
+                # Draw the background
+                pygame.draw.rect(
+                    surface,
+                    BACKGROUND_COLOR,
+                    flake_region
+                )
+                # Draw the full snowflake
+                snowflake.draw_outline(surface)
+                if USE_REMAP_RENDERER:
+                    renderer.draw_pixels(surface, snowflake)
+                else:
+                    snowflake.draw_pixels(surface)
         # If the whole segment needs to be redrawn
         if update_segment:
-            # Draw the background
             segment_region = segment.get_region(update=False)
-            pygame.draw.rect(
-                surface,
-                BACKGROUND_COLOR,
-                segment_region
-            )
-            # Draw the snowflake input slice
-            segment.draw_outline(surface)
-            snowflake.draw_segment(surface, segment)
+            # Swap in the precomputed slice, if there is one
+            if segment_sprite is not None:
+                surface.blit(segment_sprite, segment_region)
+            else:
+                # Draw the background
+                pygame.draw.rect(
+                    surface,
+                    BACKGROUND_COLOR,
+                    segment_region
+                )
+                # Draw the snowflake input slice
+                segment.draw_outline(surface)
+                snowflake.draw_segment(surface, segment)
+        # Sprites only apply to the frame they were swapped in for
+        segment_sprite = None
+        flake_sprite = None
         # If only the cursor needs to be redrawn
         if update_cursor:
             # Draw the cursor and get its dirty region
@@ -731,6 +1511,8 @@ def main() -> int:
         # Tick our clock 
         clock.tick(FRAME_RATE)
 
+    # Stop precomputing, so we do not leave behind unresponsive tasks
+    speculation.stop()
     # Exit out of pygame, so we do not leave behind unresponsive tasks
     pygame.quit()
     # We return with a code of 0: we did not encounter an error
@@ -739,5 +1521,6 @@ def main() -> int:
 # Runs only in the main thread
 if __name__ == "__main__":
     # Returns once pygame exits
-    RETURN_CODE = main()
+    # Optionally takes an image to import
+    RETURN_CODE = main(*sys.argv[1:2])
     sys.exit(RETURN_CODE)
@@ -0,0 +1,144 @@
+'''
+Generate load against a running snowflake render server.
+
+Sends render requests from several threads, reports throughput and latency,
+then prints the server's own metrics.
+'''
+from __future__ import annotations
+
+# === IMPORTS ===
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+from snowflake import VALID_SIZES
+
+# === CONSTANTS ===
+DEFAULT_URL = "http://127.0.0.1:8000"
+DEFAULT_REQUESTS = 500
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DISTINCT = 20
+DEFAULT_POINTS = 200
+DEFAULT_RESOLUTION = 300
+REQUEST_TIMEOUT = 60
+
+# === METHODS ===
+def make_definition(rng: random.Random, points: int, resolution: int) -> bytes:
+    '''
+    Returns a random JSON snowflake definition.
+    '''
+    size = rng.choice(VALID_SIZES)
+    half_arc = math.pi / size
+    definition = {
+        "size": size,
+        "mirror": rng.random() < 0.5,
+        "angle": rng.uniform(0, 2 * math.pi),
+        "resolution": resolution,
+        "points": [
+            [rng.uniform(-half_arc, half_arc), rng.random()]
+            for _ in range(points)
+        ],
+    }
+    return json.dumps(definition).encode()
+
+def percentile(samples: List[float], fraction: float) -> float:
+    '''
+    Returns the given percentile of sorted samples, in milliseconds.
+    '''
+    index = min(int(fraction * len(samples)), len(samples) - 1)
+    return samples[index] * 1000
+
+# === MAIN PROGRAM ===
+def main() -> int:
+    '''
+    The main program
+    '''
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--distinct", type=int, default=DEFAULT_DISTINCT,
+        help="number of distinct definitions to draw requests from"
+    )
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS)
+    parser.add_argument("--resolution", type=int, default=DEFAULT_RESOLUTION)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    definitions = [
+        make_definition(rng, args.points, args.resolution)
+        for _ in range(args.distinct)
+    ]
+    bodies = [rng.choice(definitions) for _ in range(args.requests)]
+
+    # Shared results
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    next_index = 0
+
+    def worker() -> None:
+        nonlocal next_index
+        while True:
+            with lock:
+                if next_index >= len(bodies):
+                    return
+                body = bodies[next_index]
+                next_index += 1
+            request = urllib.request.Request(
+                args.url + "/render",
+                data=body,
+                headers={"Content-Type": "application/json"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as error:
+                status = error.code
+            except OSError:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    # Run the load
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Report
+    latencies.sort()
+    print(f"Requests:   {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f}/s)")
+    print(f"Statuses:   {dict(sorted(statuses.items()))}")
+    print(
+        f"Latency ms: p50 {percentile(latencies, 0.5):.1f}, "
+        f"p95 {percentile(latencies, 0.95):.1f}, "
+        f"max {percentile(latencies, 1):.1f}"
+    )
+    with urllib.request.urlopen(args.url + "/metrics", timeout=REQUEST_TIMEOUT) as response:
+        metrics = json.load(response)
+    print(f"Server:     {json.dumps(metrics, indent=2)}")
+
+    # Fail if anything other than a render came back
+    return 0 if set(statuses) == {200} else 1
+
+# Runs only in the main thread
+if __name__ == "__main__":
+    RETURN_CODE = main()
+    sys.exit(RETURN_CODE)
@@ -0,0 +1,425 @@
+'''
+Serve rendered snowflakes over HTTP!
+
+POST a JSON snowflake definition to /render to receive a PNG.
+GET /metrics to receive queue depth, cache and render latency statistics as JSON.
+'''
+from __future__ import annotations
+
+# === IMPORTS ===
+import argparse
+import collections
+import io
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, OrderedDict, Tuple
+
+# Render without opening a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from snowflake import DEFAULT_MIRROR, DEFAULT_SIZE, VALID_SIZES, render_snowflake
+
+# === CONSTANTS ===
+# Server constants
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_LIMIT = 64
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+RENDER_TIMEOUT = 30
+# Request limits
+DEFAULT_RESOLUTION = 300
+MIN_RESOLUTION = 16
+MAX_RESOLUTION = 2048
+MAX_POINTS = 20000
+MAX_BODY_BYTES = 4 * 1024 * 1024
+# Metrics constants
+LATENCY_SAMPLES = 1000
+
+# Canonical form of a render request: (points, size, mirror, angle, resolution)
+RenderKey = Tuple[Tuple[Tuple[float, float], ...], int, bool, float, int]
+
+# === METHODS ===
+def parse_request(data: bytes) -> RenderKey:
+    '''
+    Parses and validates a JSON snowflake definition.
+
+    Points are sorted and the angle is normalized, so that equivalent
+    definitions share a single key.
+
+    Raises ValueError if the definition is invalid.
+    Returns the canonical render key.
+    '''
+    try:
+        body = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(f"Invalid JSON: {error}") from error
+    if not isinstance(body, dict):
+        raise ValueError("Expected a JSON object")
+
+    # Slice count
+    size = body.get("size", DEFAULT_SIZE)
+    if not isinstance(size, int) or isinstance(size, bool) or size not in VALID_SIZES:
+        raise ValueError(f"size must be one of {VALID_SIZES}")
+    # Mirror mode
+    mirror = body.get("mirror", DEFAULT_MIRROR)
+    if not isinstance(mirror, bool):
+        raise ValueError("mirror must be a boolean")
+    # Rotation angle, in radians
+    angle = body.get("angle", 0)
+    if not isinstance(angle, (int, float)) or isinstance(angle, bool) \
+            or not math.isfinite(angle):
+        raise ValueError("angle must be a finite number")
+    angle = float(angle) % (2 * math.pi)
+    # Output width and height, in pixels
+    resolution = body.get("resolution", DEFAULT_RESOLUTION)
+    if not isinstance(resolution, int) or isinstance(resolution, bool) \
+            or not MIN_RESOLUTION <= resolution <= MAX_RESOLUTION:
+        raise ValueError(
+            f"resolution must be an integer from {MIN_RESOLUTION} to {MAX_RESOLUTION}"
+        )
+    # (theta, radius) pairs, with the radius as a fraction of the flake radius
+    raw_points = body.get("points", [])
+    if not isinstance(raw_points, list) or len(raw_points) > MAX_POINTS:
+        raise ValueError(f"points must be a list of at most {MAX_POINTS} pairs")
+    points = set()
+    for point in raw_points:
+        if not isinstance(point, list) or len(point) != 2 or not all(
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                and math.isfinite(value) for value in point):
+            raise ValueError("Each point must be a [theta, radius] pair of numbers")
+        theta, radius = point
+        points.add((float(theta), float(radius)))
+
+    return (tuple(sorted(points)), size, mirror, angle, resolution)
+
+def encode_png(surface: pygame.Surface) -> bytes:
+    '''
+    Returns the surface encoded as a PNG image.
+    '''
+    buffer = io.BytesIO()
+    pygame.image.save(surface, buffer, "render.png")
+    return buffer.getvalue()
+
+def render_png(key: RenderKey) -> bytes:
+    '''
+    Renders the snowflake described by the key, as a PNG image.
+    '''
+    points, size, mirror, angle, resolution = key
+    surface = render_snowflake(
+        points,
+        size=size,
+        mirror=mirror,
+        angle=angle,
+        resolution=resolution
+    )
+    return encode_png(surface)
+
+# === CLASSES ===
+class QueueFullError(Exception):
+    '''
+    Raised when the render queue cannot accept any more work.
+    '''
+
+class RenderService:
+    '''
+    Renders snowflakes on a bounded worker pool.
+
+    Identical requests that are rendered at the same time share a single render,
+    and encoded images are kept in a least recently used cache.
+    '''
+    queue_limit: int
+    cache_bytes: int
+
+    _executor: ThreadPoolExecutor
+    _lock: threading.Lock
+    _cache: OrderedDict[RenderKey, bytes]
+    _cached_bytes: int
+    _in_flight: Dict[RenderKey, Future]
+    _queued: int
+    _rendering: int
+    _latencies: Deque[float]
+    _counters: Dict[str, int]
+
+    def __init__(
+            self,
+            *,
+            workers: int = DEFAULT_WORKERS,
+            queue_limit: int = DEFAULT_QUEUE_LIMIT,
+            cache_bytes: int = DEFAULT_CACHE_BYTES
+        ) -> RenderService:
+        '''
+        Initializes the render service.
+
+        At most queue_limit renders may be waiting for a worker at once.
+        '''
+        self.queue_limit = queue_limit
+        self.cache_bytes = cache_bytes
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="snowflake-render"
+        )
+        self._lock = threading.Lock()
+        # Data
+        self._cache = collections.OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight = {}
+        # Metrics
+        self._queued = 0
+        self._rendering = 0
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._counters = {
+            "requests": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "renders": 0,
+            "rejected": 0,
+            "errors": 0,
+        }
+
+    def render(self, key: RenderKey, timeout: Optional[float] = RENDER_TIMEOUT) -> bytes:
+        '''
+        Returns the PNG image for the given key.
+
+        Raises QueueFullError if the render would have to wait behind too many others,
+        and concurrent.futures.TimeoutError if it does not finish within the timeout.
+        '''
+        with self._lock:
+            self._counters["requests"] += 1
+            # Served straight from the cache
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._counters["cache_hits"] += 1
+                return cached
+            # Share an identical render that is already underway
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+            else:
+                if self._queued >= self.queue_limit:
+                    self._counters["rejected"] += 1
+                    raise QueueFullError("Render queue is full")
+                self._queued += 1
+                future = self._executor.submit(self._render, key)
+                self._in_flight[key] = future
+        return future.result(timeout)
+
+    def _render(self, key: RenderKey) -> bytes:
+        '''
+        Renders on a worker thread, then caches the result.
+        '''
+        with self._lock:
+            self._queued -= 1
+            self._rendering += 1
+        start = time.perf_counter()
+        try:
+            data = render_png(key)
+        except Exception:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        else:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - start)
+                self._counters["renders"] += 1
+                self._store(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._rendering -= 1
+                self._in_flight.pop(key, None)
+
+    def _store(self, key: RenderKey, data: bytes) -> None:
+        '''
+        Adds an image to the cache, evicting the least recently used ones to fit.
+
+        Must be called while holding the lock.
+        '''
+        if len(data) > self.cache_bytes:
+            return
+        self._cache[key] = data
+        self._cached_bytes += len(data)
+        while self._cached_bytes > self.cache_bytes:
+            _key, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    def metrics(self) -> Dict[str, object]:
+        '''
+        Returns a snapshot of the service metrics.
+
+        Latencies are in milliseconds, over the most recent renders.
+        '''
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self._counters)
+            metrics.update(
+                queue_depth=self._queued,
+                rendering=self._rendering,
+                cache_entries=len(self._cache),
+                cache_bytes=self._cached_bytes,
+            )
+        # Summarize the render latency
+        def percentile(fraction: float) -> float:
+            index = min(int(fraction * len(latencies)), len(latencies) - 1)
+            return round(latencies[index] * 1000, 3)
+        if latencies:
+            metrics["render_latency_ms"] = {
+                "samples": len(latencies),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": percentile(1),
+            }
+        else:
+            metrics["render_latency_ms"] = {"samples": 0}
+        return metrics
+
+    def shutdown(self) -> None:
+        '''
+        Stops the worker pool once all queued renders are done.
+        '''
+        self._executor.shutdown(wait=True)
+
+class RenderHandler(BaseHTTPRequestHandler):
+    '''
+    Handles HTTP requests for the render server.
+    '''
+    server: RenderServer
+
+    def do_GET(self) -> None:
+        '''
+        Serves the metrics endpoint.
+        '''
+        if self.path != "/metrics":
+            self._send(404, "text/plain", b"Not found")
+            return
+        body = json.dumps(self.server.service.metrics()).encode()
+        self._send(200, "application/json", body)
+
+    def do_POST(self) -> None:
+        '''
+        Serves the render endpoint.
+        '''
+        if self.path != "/render":
+            self._send(404, "text/plain", b"Not found")
+            return
+        # Read the definition
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            self._send(400, "text/plain", b"Invalid Content-Length")
+            return
+        data = self.rfile.read(length)
+        try:
+            key = parse_request(data)
+        except ValueError as error:
+            self._send(400, "text/plain", str(error).encode())
+            return
+        # Render it
+        try:
+            image = self.server.service.render(key)
+        except QueueFullError as error:
+            self._send(503, "text/plain", str(error).encode(), {"Retry-After": "1"})
+            return
+        except FutureTimeoutError:
+            self._send(503, "text/plain", b"Render timed out", {"Retry-After": "1"})
+            return
+        except Exception as error: # pylint: disable=broad-except
+            self._send(500, "text/plain", f"Render failed: {error}".encode())
+            return
+        self._send(200, "image/png", image)
+
+    def log_message(self, format: str, *args) -> None: # pylint: disable=redefined-builtin
+        '''
+        Only logs requests when the server is verbose.
+        '''
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(
+            self,
+            status: int,
+            content_type: str,
+            body: bytes,
+            headers: Optional[Dict[str, str]] = None
+        ) -> None:
+        '''
+        Sends a complete response.
+        '''
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+class RenderServer(ThreadingHTTPServer):
+    '''
+    An HTTP server backed by a render service.
+    '''
+    daemon_threads = True
+    request_queue_size = 128
+    service: RenderService
+    verbose: bool
+
+    def __init__(
+            self,
+            address: Tuple[str, int],
+            service: RenderService,
+            *,
+            verbose: bool = False
+        ) -> RenderServer:
+        '''
+        Initializes the server, listening on the given address.
+        '''
+        super().__init__(address, RenderHandler)
+        self.service = service
+        self.verbose = verbose
+
+# === MAIN PROGRAM ===
+def main() -> int:
+    '''
+    The main program
+    '''
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--queue-limit", type=int, default=DEFAULT_QUEUE_LIMIT)
+    parser.add_argument("--cache-bytes", type=int, default=DEFAULT_CACHE_BYTES)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    service = RenderService(
+        workers=args.workers,
+        queue_limit=args.queue_limit,
+        cache_bytes=args.cache_bytes
+    )
+    server = RenderServer((args.host, args.port), service, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving snowflakes on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+# Runs only in the main thread
+if __name__ == "__main__":
+    RETURN_CODE = main()
+    sys.exit(RETURN_CODE)
@@ -0,0 +1,66 @@
+'''
+Checks importing images into a snowflake.
+'''
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy
+import pygame
+import pytest
+
+import snowflake
+
+# === CONSTANTS ===
+IMAGE_SIZE = (4000, 3000)
+
+# === FIXTURES ===
+@pytest.fixture(scope="module")
+def image() -> pygame.Surface:
+    '''
+    A 12 megapixel image of dark lines and a dark disc on a light background.
+    '''
+    width, height = IMAGE_SIZE
+    x, y = numpy.meshgrid(numpy.arange(width), numpy.arange(height), indexing="ij")
+    pixels = numpy.full((width, height, 3), 230, numpy.uint8)
+    pixels[numpy.abs(x * 0.75 - y) < 40] = 10
+    pixels[numpy.abs(x * 0.75 + y - height) < 40] = 10
+    pixels[(x - width / 2) ** 2 + (y - height / 2) ** 2 < 300 ** 2] = 20
+    return pygame.surfarray.make_surface(pixels)
+
+# === TESTS ===
+@pytest.mark.parametrize("size", snowflake.VALID_SIZES)
+def test_points_are_inside_segment(image: pygame.Surface, size: int):
+    '''
+    Every imported point lies within the segment, as decided by contains_point.
+    '''
+    segment = snowflake.SnowflakeSegment(
+        radius=snowflake.SNOWFLAKE_SEGMENT_RADIUS,
+        size=size,
+        origin=snowflake.SNOWFLAKE_SEGMENT_POSITION
+    )
+    flake = snowflake.Snowflake(
+        radius=snowflake.SNOWFLAKE_RADIUS,
+        size=size,
+        origin=snowflake.SNOWFLAKE_POSITION
+    )
+    count = snowflake.import_image(image, flake, segment)
+    assert count == len(flake.pixels) > 0
+    for pixel in flake.pixels:
+        # Scale back to the segment, as when drawing
+        point = snowflake.PolarPoint(pixel.radius * segment.radius / flake.radius, pixel.theta)
+        assert segment.contains_point(point)
+
+def test_invert_selects_light_pixels(image: pygame.Surface):
+    '''
+    Inverting the threshold imports the background instead of the drawing.
+    '''
+    segment = snowflake.SnowflakeSegment(radius=snowflake.SNOWFLAKE_SEGMENT_RADIUS)
+    dark = snowflake.Snowflake(radius=snowflake.SNOWFLAKE_RADIUS)
+    light = snowflake.Snowflake(radius=snowflake.SNOWFLAKE_RADIUS)
+    dark_count = snowflake.import_image(image, dark, segment)
+    light_count = snowflake.import_image(image, light, segment, invert=True)
+    assert dark_count > 0 and light_count > 0
+    dark_points = {(pixel.theta, pixel.radius) for pixel in dark.pixels}
+    light_points = {(pixel.theta, pixel.radius) for pixel in light.pixels}
+    assert not dark_points & light_points
@@ -0,0 +1,113 @@
+'''
+Checks the remap renderer against Snowflake.draw_pixels.
+'''
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy
+import pygame
+import pytest
+
+import snowflake
+
+# === CONSTANTS ===
+RADIUS = 150
+CENTER = 160
+SIDE = 2 * CENTER
+LINE_LENGTH = 30
+
+# === METHODS ===
+def render_both(size: int, mirror: bool, angle: float):
+    '''
+    Renders a radial line of points from the origin with both renderers.
+
+    Returns the foreground masks of Snowflake.draw_pixels and RemapRenderer.draw_pixels.
+    '''
+    flake = snowflake.Snowflake(
+        radius=RADIUS,
+        size=size,
+        origin=(CENTER, snowflake.SCREEN_HEIGHT - CENTER),
+        mirror=mirror
+    )
+    for radius in range(LINE_LENGTH + 1):
+        flake.set_pixel(snowflake.PolarPoint(radius, 0), 1)
+    flake.rotate(angle)
+
+    masks = []
+    for draw in (flake.draw_pixels, lambda surface: snowflake.RemapRenderer(
+            radius=RADIUS, size=size).draw_pixels(surface, flake)):
+        surface = pygame.Surface((SIDE, SIDE))
+        surface.fill(snowflake.BACKGROUND_COLOR)
+        draw(surface)
+        pixels = pygame.surfarray.array3d(surface)
+        masks.append((pixels == snowflake.SNOWFLAKE_COLOR).all(axis=2))
+    return masks
+
+def dilate(mask: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns the mask grown by one pixel in every direction.
+    '''
+    padded = numpy.pad(mask, 1)
+    grown = numpy.zeros_like(mask)
+    for dx in range(3):
+        for dy in range(3):
+            grown |= padded[dx:dx + SIDE, dy:dy + SIDE]
+    return grown
+
+def distance_from_center() -> numpy.ndarray:
+    '''
+    Returns the distance of each surface pixel from the snowflake origin.
+    '''
+    offsets = numpy.arange(SIDE) - CENTER
+    x, y = numpy.meshgrid(offsets, offsets, indexing="ij")
+    return numpy.hypot(x, y)
+
+# === TESTS ===
+@pytest.mark.parametrize("size", snowflake.VALID_SIZES)
+@pytest.mark.parametrize("mirror", (True, False))
+@pytest.mark.parametrize("angle", (0, 0.37))
+def test_center_is_solid(size: int, mirror: bool, angle: float):
+    '''
+    Where every slice overlaps, near the origin, both renderers draw a solid disc.
+    '''
+    expected, actual = render_both(size, mirror, angle)
+    core = distance_from_center() <= snowflake.LINE_THICKNESS
+    assert expected[core].all()
+    assert actual[core].all()
+
+@pytest.mark.parametrize("size", snowflake.VALID_SIZES)
+@pytest.mark.parametrize("mirror", (True, False))
+def test_matches_draw_pixels_near_origin(size: int, mirror: bool):
+    '''
+    Near the origin, the renderers only differ at the edges of the drawn circles.
+
+    Snowflake.draw_pixels truncates circle positions and pygame rasterizes circles
+    slightly off center, so edges may shift by up to two pixels.
+    '''
+    expected, actual = render_both(size, mirror, 0.37)
+    near = distance_from_center() <= LINE_LENGTH + snowflake.LINE_THICKNESS
+    assert not (expected & ~dilate(dilate(actual)) & near).any()
+    assert not (actual & ~dilate(dilate(expected)) & near).any()
+    assert abs(int(actual[near].sum()) - int(expected[near].sum())) <= 0.1 * expected[near].sum()
+    # No holes: wherever draw_pixels is solid, so is the remap renderer
+    solid = ~dilate(dilate(~expected))
+    assert not (solid & ~actual & near).any()
+
+@pytest.mark.parametrize("size", snowflake.VALID_SIZES)
+@pytest.mark.parametrize("mirror", (True, False))
+def test_every_frame_moves(size: int, mirror: bool):
+    '''
+    Each frame of the rotation animation differs from the last, so it never stalls.
+    '''
+    renderer = snowflake.RemapRenderer(radius=RADIUS, size=size)
+    flake = snowflake.Snowflake(radius=RADIUS, size=size, mirror=mirror)
+    # A line out to the edge, where rotation moves pixels the furthest
+    for radius in range(0, RADIUS, 2):
+        flake.set_pixel(snowflake.PolarPoint(radius, 0), 1)
+    previous = None
+    for _ in range(1000):
+        flake.rotate(snowflake.ROTATION_SPEED)
+        current = pygame.surfarray.array2d(renderer.render(flake))
+        assert previous is None or not numpy.array_equal(current, previous)
+        previous = current
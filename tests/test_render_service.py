@@ -0,0 +1,158 @@
+'''
+Checks the caching, coalescing and queueing of the render service.
+'''
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import snowflake_server
+
+# === CONSTANTS ===
+WAIT_TIMEOUT = 5
+
+# === METHODS ===
+def make_key(name: int) -> snowflake_server.RenderKey:
+    '''
+    Returns a distinct render key.
+    '''
+    return (((0.0, name / 100),), 6, True, 0.0, 100)
+
+def wait_for(condition) -> None:
+    '''
+    Waits until the condition holds, failing the test if it takes too long.
+    '''
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting"
+        time.sleep(0.001)
+
+class FakeRenderer:
+    '''
+    Stands in for render_png, so renders can be held back and counted.
+    '''
+    def __init__(self, *, image_bytes: int = 10, blocked: bool = False):
+        self.image_bytes = image_bytes
+        self.calls = []
+        self.release = threading.Event()
+        if not blocked:
+            self.release.set()
+
+    def __call__(self, key: snowflake_server.RenderKey) -> bytes:
+        self.calls.append(key)
+        assert self.release.wait(WAIT_TIMEOUT)
+        return repr(key).encode()[:self.image_bytes].ljust(self.image_bytes)
+
+# === FIXTURES ===
+@pytest.fixture
+def renderer(monkeypatch, request):
+    '''
+    Replaces rendering with a fake renderer.
+    '''
+    fake = FakeRenderer(**getattr(request, "param", {}))
+    monkeypatch.setattr(snowflake_server, "render_png", fake)
+    yield fake
+    fake.release.set()
+
+# === TESTS ===
+def test_cache_evicts_least_recently_used_by_bytes(renderer):
+    '''
+    The cache holds as many bytes as allowed, evicting the least recently used images.
+    '''
+    service = snowflake_server.RenderService(workers=1, cache_bytes=25)
+    first, second, third = make_key(1), make_key(2), make_key(3)
+    service.render(first)
+    service.render(second)
+    # Using the first image makes the second the least recently used
+    service.render(first)
+    service.render(third)
+    metrics = service.metrics()
+    assert metrics["cache_hits"] == 1
+    assert metrics["cache_entries"] == 2
+    assert metrics["cache_bytes"] == 20
+
+    # The first image is still cached, the second must be rendered again
+    service.render(first)
+    service.render(second)
+    assert renderer.calls == [first, second, third, second]
+    service.shutdown()
+
+def test_cache_skips_images_larger_than_the_cache(renderer):
+    '''
+    An image that could never fit is served but not cached.
+    '''
+    service = snowflake_server.RenderService(workers=1, cache_bytes=5)
+    service.render(make_key(1))
+    assert service.metrics()["cache_entries"] == 0
+    service.shutdown()
+
+@pytest.mark.parametrize("renderer", [{"blocked": True}], indirect=True)
+def test_identical_requests_are_coalesced(renderer):
+    '''
+    Identical requests made while a render is underway share that render.
+    '''
+    service = snowflake_server.RenderService(workers=2)
+    key = make_key(1)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.render(key)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: service.metrics()["coalesced"] == 2)
+    renderer.release.set()
+    for thread in threads:
+        thread.join(WAIT_TIMEOUT)
+
+    assert len(results) == 3 and len(set(results)) == 1
+    assert renderer.calls == [key]
+    metrics = service.metrics()
+    assert metrics["requests"] == 3
+    assert metrics["renders"] == 1
+    service.shutdown()
+
+@pytest.mark.parametrize("renderer", [{"blocked": True}], indirect=True)
+def test_full_queue_is_rejected(renderer):
+    '''
+    Renders that would wait behind a full queue are rejected.
+    '''
+    service = snowflake_server.RenderService(workers=1, queue_limit=1)
+    # One render occupies the worker, and another waits in the queue
+    threading.Thread(target=service.render, args=(make_key(1),)).start()
+    wait_for(lambda: service.metrics()["rendering"] == 1)
+    threading.Thread(target=service.render, args=(make_key(2),)).start()
+    wait_for(lambda: service.metrics()["queue_depth"] == 1)
+
+    with pytest.raises(snowflake_server.QueueFullError):
+        service.render(make_key(3))
+    assert service.metrics()["rejected"] == 1
+    renderer.release.set()
+    service.shutdown()
+
+@pytest.mark.parametrize("renderer", [{"blocked": True}], indirect=True)
+def test_timed_out_render_is_unavailable(renderer):
+    '''
+    A render that takes too long is answered with 503 and Retry-After.
+    '''
+    service = snowflake_server.RenderService(workers=1)
+    server = snowflake_server.RenderServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    # Shorten the timeout for this test
+    render = service.render
+    service.render = lambda key: render(key, timeout=0.05)
+    request = urllib.request.Request(f"http://{host}:{port}/render", data=b"{}")
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=WAIT_TIMEOUT)
+    assert error.value.code == 503
+    assert error.value.headers["Retry-After"] == "1"
+    assert error.value.read() == b"Render timed out"
+
+    server.shutdown()
+    server.server_close()
+    renderer.release.set()
+    service.shutdown()
@@ -0,0 +1,120 @@
+'''
+Checks the background precomputation of Tab and M.
+'''
+import math
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+import snowflake
+
+# === CONSTANTS ===
+WAIT_TIMEOUT = 10
+POINTS = 500
+
+# === METHODS ===
+def make_flake(size: int = snowflake.DEFAULT_SIZE):
+    '''
+    Returns a snowflake filled with random points, and its segment.
+    '''
+    segment = snowflake.SnowflakeSegment(
+        radius=snowflake.SNOWFLAKE_SEGMENT_RADIUS,
+        size=size,
+        origin=snowflake.SNOWFLAKE_SEGMENT_POSITION
+    )
+    flake = snowflake.Snowflake(
+        radius=snowflake.SNOWFLAKE_RADIUS,
+        size=size,
+        origin=snowflake.SNOWFLAKE_POSITION,
+        mirror=True
+    )
+    rng = random.Random(0)
+    half_arc = math.pi / size
+    for _ in range(POINTS):
+        point = snowflake.PolarPoint(
+            rng.random() * flake.radius,
+            rng.uniform(-half_arc, half_arc) % snowflake.RADIANS_IN_CIRCLE
+        )
+        flake.set_pixel(point, 1)
+    return flake, segment
+
+def take_size_when_ready(speculation, flake, segment):
+    '''
+    Requests precomputation, then takes the result for the next size once it is ready.
+    '''
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        speculation.request(flake, segment, static=True)
+        result = speculation.take_size(flake, static=True)
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    raise AssertionError("Timed out waiting for speculation")
+
+# === FIXTURES ===
+@pytest.fixture
+def speculation():
+    '''
+    A running speculative renderer.
+    '''
+    renderer = snowflake.SpeculativeRenderer()
+    renderer.start()
+    yield renderer
+    renderer.stop()
+
+# === TESTS ===
+def test_take_size_matches_tab(speculation):
+    '''
+    The precomputed pixels for each size match pruning the pixels directly.
+    '''
+    flake, segment = make_flake()
+    for _ in range(len(snowflake.VALID_SIZES)):
+        result = take_size_when_ready(speculation, flake, segment)
+        expected = flake.copy()
+        expected.size = segment.size = snowflake.next_size(flake.size)
+        expected.clear_pixels_outside(segment)
+        assert result.size == expected.size
+        assert set(result.pixels) == set(expected.pixels)
+        flake.size = result.size
+        flake.pixels = result.pixels
+
+def test_take_size_builds_remap_bitmaps():
+    '''
+    With a remap renderer, each precomputed size comes with its bitmap instead of a flake sprite.
+    '''
+    remap = snowflake.RemapRenderer(radius=snowflake.SNOWFLAKE_RADIUS)
+    speculation = snowflake.SpeculativeRenderer(remap=remap)
+    speculation.start()
+    try:
+        flake, segment = make_flake()
+        for _ in range(len(snowflake.VALID_SIZES)):
+            result = take_size_when_ready(speculation, flake, segment)
+            flake.size = result.size
+            flake.pixels = result.pixels
+            assert result.flake_sprite is None
+            assert (result.bitmap == remap.build_bitmap(flake)).all()
+    finally:
+        speculation.stop()
+
+def test_recovers_after_failure(speculation, monkeypatch, capsys):
+    '''
+    An error while precomputing is reported, and later requests still work.
+    '''
+    render = snowflake.render_segment_sprite
+    failures = []
+    def fail_once(*args):
+        if not failures:
+            failures.append(True)
+            raise RuntimeError("Render failed")
+        return render(*args)
+    monkeypatch.setattr(snowflake, "render_segment_sprite", fail_once)
+
+    flake, segment = make_flake()
+    result = take_size_when_ready(speculation, flake, segment)
+    assert failures
+    assert result.size == snowflake.next_size(snowflake.DEFAULT_SIZE)
+    assert "Render failed" in capsys.readouterr().err